@@ -6,7 +6,10 @@ from urllib.parse import urlparse
 from datetime import datetime, timedelta
 import base64
 import json
+import functools
 import time
+import asyncio
+import threading
 
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
@@ -15,11 +18,15 @@ from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 import html2text
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from lxml.etree import ParserError
+from selectolax.parser import HTMLParser
 import yfinance as yf
 
 class NewsletterStory(BaseModel):
@@ -53,43 +60,127 @@ NEWSLETTER_SENDERS = [
     'theguardian.com', 'forbes.com', 'businessinsider.com', 'cnbc.com',
     'marketwatch.com', 'yahoo.com', 'msn.com', 'tldr.tech', 'tldrnewsletter.com'
 ]
+# Exclude obvious promotional keywords (reduced list)
+PROMOTIONAL_KEYWORDS = [
+    'webinar registration', 'join our webinar', 'register now', 'limited time offer',
+    'exclusive offer', 'claim your discount', 'act now', 'hurry',
+    'hackathon registration', 'event registration', 'rsvp now'
+]
+# Newsletter indicators
+NEWSLETTER_KEYWORDS = [
+    'newsletter', 'daily', 'weekly', 'digest', 'roundup', 'briefing',
+    'news', 'report', 'summary', 'recap', 'update', 'bulletin'
+]
+
+# Single-pass substring matchers for the lists above, used by is_valid_newsletter
+_NEWSLETTER_DOMAIN_RE = re.compile('|'.join(re.escape(d) for d in NEWSLETTER_SENDERS))
+_PROMO_RE = re.compile('|'.join(re.escape(k) for k in PROMOTIONAL_KEYWORDS))
+_NL_KW_RE = re.compile('|'.join(re.escape(k) for k in NEWSLETTER_KEYWORDS))
+
+# Short-lived cache of formatted ticker data: symbol -> (fetched_at, formatted)
+_TICKER_CACHE: Dict[str, tuple] = {}
+_TICKER_CACHE_LOCK = threading.Lock()
+_TICKER_TTL = 90.0  # seconds; quotes only move on ~minute granularity
+_TICKER_CACHE_MAX = 1024
+
+# Gmail credentials reused across tool invocations, keyed on the mtime of token.json
+# so a re-run of setup_gmail.py is picked up. Services are built per call: each one
+# owns an httplib2 transport, which is not safe to share between threads.
+_GMAIL_CREDS = None
+_GMAIL_TOKEN_MTIME = None
+
+# Gmail recommends at most 50 calls per batch; messages.get costs 5 quota units each
+GMAIL_BATCH_SIZE = 50
+# Per-message retries (with exponential backoff) for rate-limited batch items
+GMAIL_MAX_RETRIES = 3
+GMAIL_RETRY_DELAY = 1.0  # seconds
+# Partial-response masks: only the fields the filter and MIME walk read
+GMAIL_LIST_FIELDS = 'messages/id,nextPageToken'
+GMAIL_METADATA_FIELDS = 'payload/headers'
+GMAIL_BODY_FIELDS = 'payload(mimeType,body/data,parts(mimeType,body/data,parts))'
+# Upper bound on message IDs collected across result pages
+GMAIL_MAX_MESSAGES = 200
+# Smaller batches for full bodies so parsing one batch overlaps fetching the next
+GMAIL_BODY_BATCH_SIZE = 20
+
+# Build only the <body> subtree; <head> (meta, link, its scripts/styles) is skipped
+_STRAINER = SoupStrainer('body')
+# Three or more newlines once lines are stripped, i.e. two or more consecutive blank lines
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+# Newsletter parsing patterns, compiled once instead of per line/story
+# TLDR headline: ALL CAPS with (X MINUTE READ) and [link], e.g. "CHATGPT ATLAS (4 MINUTE READ) [5]"
+_TLDR_HEADLINE_RE = re.compile(r'^([A-Z][A-Z\s&\',AI-]+)\s*\((\d+)\s+MINUTE\s+READ\)\s*\[\d+\]')
+_TLDR_HEADLINE_ANCHOR = 'MINUTE READ'
+# Emoji marker or ALL CAPS section header (over 20 chars) in one alternation
+_SECTION_BREAK_RE = re.compile(r'^(?:(?P<emoji>[🚀🧠💼📱🎯🔥]+\s*$)|(?P<section>[A-Z\s&]{21,}$))')
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+_ZW_TRANS = str.maketrans('', '', '\u200c')
+_TLDR_MAX_CONTENT_LINES = 10
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPACES_RE = re.compile(r' +')
+_ZW_SPACED_RE = re.compile(r'\s*‌\s*')
+_SECTION_SPLIT_RE = re.compile(r'(?:\n\s*\n|[•·▪▫]\s+|\d+\.\s+)')
+_CAPITALIZED_NAME_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b')
+_COMPANY_RES = [re.compile(p) for p in [
+    r'\b(Google|Amazon|Microsoft|Apple|Meta|OpenAI|Anthropic|Tesla|Nvidia|AMD|Intel|AWS|DeepSeek|ChatGPT)\b',
+    r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\s+(?:announced|launched|released|unveiled|introduced|revealed)',
+    r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\'s\s+',
+]]
 
 def get_today_date():
     """Get today's date in the format required by Gmail API."""
-    try:
-        # Get current date
-        today = datetime.now()
-        
-        # Format for Gmail API (YYYY/MM/DD)
-        formatted_date = today.strftime('%Y/%m/%d')
-        
-        # Also try alternative formats in case Gmail API is picky
-        alt_formats = [
-            today.strftime('%Y/%m/%d'),
-            today.strftime('%Y-%m-%d'),
-            today.strftime('%Y%m%d')
-        ]
-        
-        return {
-            "status": "success",
-            "primary_date": formatted_date,
-            "alt_dates": alt_formats,
-            "raw_date": today.isoformat()
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Failed to get date: {str(e)}"
-        }
+    # Keyed on the calendar day so the cached result rolls over at midnight
+    return _today_date_for(datetime.now().toordinal())
+
+@functools.lru_cache(maxsize=1)
+def _today_date_for(day_key: int):
+    """Build the date formats for the given day; memoized per day.
+
+    raw_date is the ISO calendar date only (no time part), since the result is
+    shared by every call made during that day.
+    """
+    # day_key is a proleptic Gregorian ordinal taken from datetime.now(), so it is always valid
+    today = datetime.fromordinal(day_key).date()
+    
+    # Format for Gmail API (YYYY/MM/DD)
+    formatted_date = today.strftime('%Y/%m/%d')
+    
+    # Also try alternative formats in case Gmail API is picky
+    alt_formats = [
+        today.strftime('%Y/%m/%d'),
+        today.strftime('%Y-%m-%d'),
+        today.strftime('%Y%m%d')
+    ]
+    
+    return {
+        "status": "success",
+        "primary_date": formatted_date,
+        "alt_dates": alt_formats,
+        "raw_date": today.isoformat()
+    }
 
 def get_gmail_service():
-    """Initialize Gmail API service with OAuth2 authentication."""
+    """Initialize Gmail API service with OAuth2 authentication.
+
+    Credentials are cached while they are valid and token.json is unchanged;
+    otherwise they are reloaded (and refreshed) from disk. Each call returns a
+    new service so concurrent tool invocations never share a transport.
+    """
+    global _GMAIL_CREDS, _GMAIL_TOKEN_MTIME
     creds = None
     token_file = 'token.json'
     credentials_file = 'credentials.json'
+
+    token_path = pathlib.Path(token_file)
+    token_mtime = token_path.stat().st_mtime if token_path.exists() else None
+    if _GMAIL_CREDS is not None and _GMAIL_TOKEN_MTIME == token_mtime and _GMAIL_CREDS.valid:
+        creds = _GMAIL_CREDS
+    else:
+        invalidate_gmail_service()
     
     # Load existing credentials
-    if pathlib.Path(token_file).exists():
+    if creds is None and pathlib.Path(token_file).exists():
         creds = Credentials.from_authorized_user_file(token_file, SCOPES)
     
     # If no valid credentials, request authorization
@@ -108,93 +199,150 @@ def get_gmail_service():
     
     try:
         service = build('gmail', 'v1', credentials=creds)
+        if creds is not _GMAIL_CREDS:
+            _GMAIL_CREDS, _GMAIL_TOKEN_MTIME = creds, token_path.stat().st_mtime
         return {"status": "success", "service": service}
     except Exception as e:
         return {"status": "error", "message": f"Failed to initialize Gmail service: {str(e)}"}
 
-def extract_html_part(part):
-    """Recursively extract HTML content from MIME parts."""
-    if part.get('mimeType') == 'text/html':
-        if 'data' in part.get('body', {}):
-            return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-    elif part.get('mimeType') == 'text/plain':
-        if 'data' in part.get('body', {}):
-            return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-    
-    # Check subparts recursively
-    if 'parts' in part:
-        for subpart in part['parts']:
-            html_content = extract_html_part(subpart)
-            if html_content:
-                return html_content
-    
-    return None
+def invalidate_gmail_service():
+    """Drop the cached Gmail credentials, e.g. after their token failed to refresh."""
+    global _GMAIL_CREDS, _GMAIL_TOKEN_MTIME
+    _GMAIL_CREDS = _GMAIL_TOKEN_MTIME = None
+
+def list_messages(service, query: str) -> List[Dict]:
+    """List messages matching a Gmail query, following nextPageToken up to GMAIL_MAX_MESSAGES."""
+    messages = []
+    page_token = None
+    while True:
+        results = service.users().messages().list(
+            userId='me', q=query, maxResults=100, includeSpamTrash=False, pageToken=page_token,
+            fields=GMAIL_LIST_FIELDS
+        ).execute()
+        messages.extend(results.get('messages', []))
+        page_token = results.get('nextPageToken')
+        if not page_token or len(messages) >= GMAIL_MAX_MESSAGES:
+            return messages[:GMAIL_MAX_MESSAGES]
+
+def _is_retryable_error(error) -> bool:
+    """Whether a per-message batch error is worth retrying (rate limited or server error)."""
+    return isinstance(error, HttpError) and (error.resp.status == 429 or error.resp.status >= 500)
+
+def batch_get_messages(service, message_ids: List[str], **get_kwargs) -> List[tuple]:
+    """Fetch messages via Gmail batch requests, returning (id, response, exception) tuples in order.
+
+    If the batch endpoint itself fails with a server error, that chunk is
+    fetched with individual requests instead. Items that fail with a rate
+    limit or server error are retried with exponential backoff.
+    """
+    results = {}
+
+    def _on_msg(request_id, response, exception):
+        results[request_id] = (response, exception)
+
+    pending = list(message_ids)
+    for attempt in range(GMAIL_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(GMAIL_RETRY_DELAY * 2 ** (attempt - 1))
+
+        for start in range(0, len(pending), GMAIL_BATCH_SIZE):
+            chunk = pending[start:start + GMAIL_BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=_on_msg)
+            for mid in chunk:
+                batch.add(service.users().messages().get(userId='me', id=mid, **get_kwargs), request_id=mid)
+            try:
+                batch.execute()
+            except HttpError as e:
+                if e.resp.status < 500:
+                    raise
+                for mid in chunk:
+                    try:
+                        _on_msg(mid, service.users().messages().get(userId='me', id=mid, **get_kwargs).execute(), None)
+                    except Exception as msg_error:
+                        _on_msg(mid, None, msg_error)
+
+        pending = [mid for mid in pending if _is_retryable_error(results.get(mid, (None, None))[1])]
+        if not pending:
+            break
+
+    return [(mid, *results.get(mid, (None, None))) for mid in message_ids]
+
+def _decode_body(data: str) -> str:
+    """Decode a Gmail base64url body to text."""
+    return base64.urlsafe_b64decode(data).decode('utf-8', 'replace')
+
+def extract_html_part(payload):
+    """Extract the message body from MIME parts, preferring text/plain over text/html.
+
+    The TLDR parser relies on the plain-text alternative (its "[N]" link markers
+    only exist there). Only the winning part is base64-decoded.
+    """
+    stack = [payload]
+    html_data = None
+    while stack:
+        part = stack.pop()
+        mime_type = part.get('mimeType')
+        body = part.get('body', {})
+        if mime_type == 'text/plain' and 'data' in body:
+            return _decode_body(body['data'])
+        if mime_type == 'text/html' and 'data' in body and html_data is None:
+            html_data = body['data']
+        # Reversed so parts are visited in document order
+        stack.extend(reversed(part.get('parts', [])))
+    return _decode_body(html_data) if html_data is not None else None
+
+def _soup_text(html_content: str) -> str:
+    """Extract raw text with BeautifulSoup; slower fallback for the selectolax path."""
+    try:
+        soup = BeautifulSoup(html_content, 'lxml', parse_only=_STRAINER)
+    except (ParserError, FeatureNotFound):
+        # Fall back to the pure-Python parser for input lxml rejects. No strainer here:
+        # html.parser doesn't wrap bare text in <body>, so plain-text parts would be dropped.
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+    # Remove script and style elements nested inside the kept <body> subtree
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    return soup.get_text(separator='\n')
 
 def extract_text_from_html(html_content: str) -> str:
     """Extract clean text from HTML content, preserving line breaks."""
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        try:
+            tree = HTMLParser(html_content)
+            for node in tree.css('script,style'):
+                node.decompose()
+            # Get text with separator to preserve structure
+            text = tree.body.text(separator='\n') if tree.body is not None else tree.text(separator='\n')
+        except Exception:
+            text = _soup_text(html_content)
 
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-
-        # Get text with separator to preserve structure
-        text = soup.get_text(separator='\n')
-
-        # Clean up excessive blank lines but preserve single line breaks
-        lines = [line.strip() for line in text.splitlines()]
-        # Remove excessive consecutive blank lines
-        cleaned_lines = []
-        prev_blank = False
-        for line in lines:
-            if line:
-                cleaned_lines.append(line)
-                prev_blank = False
-            elif not prev_blank:
-                cleaned_lines.append('')
-                prev_blank = True
-
-        return '\n'.join(cleaned_lines)
+        # Strip each line, then collapse runs of blank lines to a single blank line
+        text = '\n'.join(line.strip() for line in text.splitlines())
+        return _BLANK_LINES_RE.sub('\n\n', text)
     except Exception as e:
         return html_content  # Return original if parsing fails
 
-def is_valid_newsletter(sender: str, subject: str, content: str, headers: List[Dict] = None) -> bool:
+def is_valid_newsletter(sender: str, subject: str, content: str, list_id: Optional[str] = None) -> bool:
     """Check if an email is a valid newsletter (not promotional/webinar)."""
     sender_lower = sender.lower()
     subject_lower = subject.lower()
-    content_lower = content.lower()
 
     # Check for List-ID header (present in almost all newsletters)
-    if headers:
-        list_id = next((h['value'] for h in headers if h['name'] == 'List-ID'), None)
-        if list_id:
-            return True  # If List-ID exists, it's likely a newsletter
+    if list_id:
+        return True  # If List-ID exists, it's likely a newsletter
 
     # Check if it's from a known newsletter domain - if yes, auto-accept
-    is_newsletter_domain = any(domain in sender_lower for domain in NEWSLETTER_SENDERS)
-    if is_newsletter_domain:
+    if _NEWSLETTER_DOMAIN_RE.search(sender_lower):
         return True  # Trust known newsletter sources
 
     # For unknown senders, be more selective
-    # Exclude obvious promotional keywords (reduced list)
-    promotional_keywords = [
-        'webinar registration', 'join our webinar', 'register now', 'limited time offer',
-        'exclusive offer', 'claim your discount', 'act now', 'hurry',
-        'hackathon registration', 'event registration', 'rsvp now'
-    ]
-
-    # Newsletter indicators
-    newsletter_keywords = [
-        'newsletter', 'daily', 'weekly', 'digest', 'roundup', 'briefing',
-        'news', 'report', 'summary', 'recap', 'update', 'bulletin'
-    ]
-
     # Check if it contains strong promotional content (subject only for unknown senders)
-    is_promotional = any(keyword in subject_lower for keyword in promotional_keywords)
+    is_promotional = _PROMO_RE.search(subject_lower) is not None
 
     # Check if it looks like a newsletter
-    looks_like_newsletter = any(keyword in subject_lower for keyword in newsletter_keywords)
+    looks_like_newsletter = _NL_KW_RE.search(subject_lower) is not None
 
     # Special case for TLDR newsletters - always valid
     is_tldr = 'tldr' in sender_lower or 'tldr' in subject_lower
@@ -204,6 +352,32 @@ def is_valid_newsletter(sender: str, subject: str, content: str, headers: List[D
     # It's a valid newsletter if it looks like a newsletter and is not strongly promotional
     return looks_like_newsletter and not is_promotional
 
+def _build_tldr_story(headline: str, content_lines: List[str], sender: str, subject: str) -> Dict:
+    """Build a story dict from a TLDR headline and its collected content lines."""
+    content = ' '.join(content_lines)
+
+    # Extract first 2-3 sentences for summary
+    sentences = _SENT_SPLIT_RE.split(content)
+    summary = '. '.join(sentences[:3])
+    if summary and not summary.endswith('.'):
+        summary += '.'
+
+    # Extract company names
+    company = "N/A"
+    for pattern in _COMPANY_RES:
+        company_match = pattern.search(content)
+        if company_match:
+            company = company_match.group(1)
+            break
+
+    return {
+        "title": headline[:200],
+        "content": summary[:1000] if summary else content[:1000],
+        "company": company,
+        "newsletter": sender,
+        "subject": subject
+    }
+
 def parse_newsletter_content(email_content: str, sender: str, subject: str) -> List[Dict]:
     """Parse newsletter content to extract individual stories."""
     stories = []
@@ -215,90 +389,51 @@ def parse_newsletter_content(email_content: str, sender: str, subject: str) -> L
         # For TLDR newsletters, parse the structured format BEFORE normalizing whitespace
         # TLDR format: "ALL CAPS HEADLINE (X MINUTE READ) [link] \n Content here..."
         if 'tldr' in sender.lower():
-            # Clean up zero-width chars but preserve newlines
-            clean_text = re.sub(r'‌', '', clean_text)  # Remove zero-width chars
-            clean_text = re.sub(r' +', ' ', clean_text)  # Multiple spaces to single space
+            # Remove zero-width chars but preserve newlines; spaces are collapsed per line below
+            clean_text = clean_text.translate(_ZW_TRANS)
 
-            # Split text into lines first to preserve structure
-            lines = clean_text.split('\n')
+            # Single forward pass: a headline opens a story, following lines are its
+            # content until the next headline or a section marker closes it
+            # One line buffer is reused for every headline; stories keep only the joined text
+            headline = None
+            content_lines = []
+            for raw_line in clean_text.splitlines():
+                line = ' '.join(raw_line.split())
 
-            i = 0
-            while i < len(lines) and len(stories) < 5:
-                line = lines[i].strip()
-
-                # Look for headline pattern: ALL CAPS with (X MINUTE READ) and [link]
-                # Example: "CHATGPT ATLAS (4 MINUTE READ) [5]"
-                headline_pattern = r'^([A-Z][A-Z\s&\',AI-]+)\s*\((\d+)\s+MINUTE\s+READ\)\s*\[\d+\]'
-                match = re.match(headline_pattern, line)
+                # Look for headline pattern: ALL CAPS with (X MINUTE READ) and [link]. Lines are
+                # space-collapsed, so the literal anchor is a cheap substring prefilter.
+                match = _TLDR_HEADLINE_RE.match(line) if _TLDR_HEADLINE_ANCHOR in line else None
 
                 if match:
-                    headline = match.group(1).strip()
-                    read_time = match.group(2)
-
-                    # Collect content from following lines until next headline or empty lines
-                    content_lines = []
-                    j = i + 1
-                    while j < len(lines) and len(content_lines) < 10:  # Limit content lines
-                        next_line = lines[j].strip()
-
-                        # Stop at next headline or section marker
-                        if re.match(headline_pattern, next_line):
-                            break
-                        if re.match(r'^[🚀🧠💼📱🎯🔥]+\s*$', next_line):  # Emoji section markers
+                    if headline and content_lines:
+                        stories.append(_build_tldr_story(headline, content_lines, sender, subject))
+                        if len(stories) >= 5:
                             break
-                        if re.match(r'^[A-Z\s&]+$', next_line) and len(next_line) > 20:  # Section headers
-                            break
-
-                        if next_line and len(next_line) > 20:  # Skip very short lines
-                            content_lines.append(next_line)
-
-                        j += 1
-
+                    headline = match.group(1).strip()
+                    content_lines.clear()
+                elif headline is None:
+                    continue
+                elif _SECTION_BREAK_RE.match(line):
+                    # Emoji or section header ends the current story
                     if content_lines:
-                        content = ' '.join(content_lines)
-
-                        # Extract first 2-3 sentences for summary
-                        sentences = re.split(r'[.!?]\s+', content)
-                        summary = '. '.join(sentences[:3])
-                        if summary and not summary.endswith('.'):
-                            summary += '.'
-
-                        # Extract company names
-                        company_patterns = [
-                            r'\b(Google|Amazon|Microsoft|Apple|Meta|OpenAI|Anthropic|Tesla|Nvidia|AMD|Intel|AWS|DeepSeek|ChatGPT)\b',
-                            r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\s+(?:announced|launched|released|unveiled|introduced|revealed)',
-                            r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\'s\s+',
-                        ]
-
-                        company = "N/A"
-                        for pattern in company_patterns:
-                            company_match = re.search(pattern, content)
-                            if company_match:
-                                company = company_match.group(1)
-                                break
-
-                        stories.append({
-                            "title": headline[:200],
-                            "content": summary[:1000] if summary else content[:1000],
-                            "company": company,
-                            "newsletter": sender,
-                            "subject": subject
-                        })
-                        i = j  # Skip to where we left off
-                    else:
-                        # No content found for this headline, move to next line
-                        i += 1
-                else:
-                    i += 1
+                        stories.append(_build_tldr_story(headline, content_lines, sender, subject))
+                        if len(stories) >= 5:
+                            break
+                    headline = None
+                elif len(content_lines) < _TLDR_MAX_CONTENT_LINES and len(line) > 20:  # Limit content lines, skip very short ones
+                    content_lines.append(line)
+            else:
+                if headline and content_lines:
+                    stories.append(_build_tldr_story(headline, content_lines, sender, subject))
 
         else:
             # Generic parsing for other newsletters
             # Normalize whitespace for non-TLDR newsletters
-            clean_text = re.sub(r'\s+', ' ', clean_text)
-            clean_text = re.sub(r'\s*‌\s*', ' ', clean_text)
+            clean_text = _WHITESPACE_RE.sub(' ', clean_text)
+            clean_text = _ZW_SPACED_RE.sub(' ', clean_text)
 
             # Split on paragraph breaks and bullet points
-            story_sections = re.split(r'(?:\n\s*\n|[•·▪▫]\s+|\d+\.\s+)', clean_text)
+            story_sections = _SECTION_SPLIT_RE.split(clean_text)
 
             for section in story_sections:
                 section = section.strip()
@@ -309,7 +444,7 @@ def parse_newsletter_content(email_content: str, sender: str, subject: str) -> L
                 title = lines[0][:200] if lines else "Untitled Story"
 
                 # Look for company mentions
-                company_match = re.search(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b', section)
+                company_match = _CAPITALIZED_NAME_RE.search(section)
                 company = company_match.group(1) if company_match else "N/A"
 
                 stories.append({
@@ -323,9 +458,10 @@ def parse_newsletter_content(email_content: str, sender: str, subject: str) -> L
                 if len(stories) >= 5:
                     break
 
+        # TLDR text keeps runs of spaces between words; collapse them only for this fallback snippet
         return stories if stories else [{
             "title": subject,
-            "content": clean_text[:500],
+            "content": _SPACES_RE.sub(' ', clean_text)[:500],
             "company": "N/A",
             "newsletter": sender,
             "subject": subject
@@ -359,10 +495,10 @@ def test_gmail_connection(tool_context: ToolContext) -> Dict[str, any]:
         for message in messages[:5]:  # Just get first 5 for testing
             try:
                 msg = service.users().messages().get(userId='me', id=message['id']).execute()
-                headers = msg['payload'].get('headers', [])
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown Sender')
-                date = next((h['value'] for h in headers if h['name'] == 'Date'), 'Unknown Date')
+                hdr = {h['name']: h['value'] for h in msg['payload'].get('headers', [])}
+                subject = hdr.get('Subject', 'No Subject')
+                sender = hdr.get('From', 'Unknown Sender')
+                date = hdr.get('Date', 'Unknown Date')
                 
                 recent_emails.append({
                     "subject": subject,
@@ -381,19 +517,25 @@ def test_gmail_connection(tool_context: ToolContext) -> Dict[str, any]:
         }
         
     except Exception as e:
+        if isinstance(e, RefreshError):
+            invalidate_gmail_service()
         return {
             "status": "error", 
             "message": f"Failed to test Gmail connection: {str(e)}"
         }
 
-def fetch_newsletters_from_inbox(tool_context: ToolContext) -> Dict[str, any]:
-    """Fetch newsletters from Gmail inbox for the current day."""
+async def fetch_newsletters_from_inbox(tool_context: ToolContext) -> Dict[str, any]:
+    """Fetch newsletters from Gmail inbox for the current day.
+
+    Blocking Gmail calls run in worker threads; body fetching and parsing are
+    pipelined so one batch is parsed while the next is in flight.
+    """
     newsletters = []
     process_log = []
     
     try:
         # Initialize Gmail service
-        gmail_result = get_gmail_service()
+        gmail_result = await asyncio.to_thread(get_gmail_service)
         if gmail_result["status"] != "success":
             process_log.append(f"Gmail service error: {gmail_result.get('message', 'Unknown error')}")
             return {
@@ -420,72 +562,122 @@ def fetch_newsletters_from_inbox(tool_context: ToolContext) -> Dict[str, any]:
         today = date_result["primary_date"]
         query = f'newer_than:1d'
         
-        # First try: Search for emails from known newsletter domains
+        # Known newsletter domains OR newsletter-like subjects, in a single round trip
         sender_query = ' OR '.join([f'from:{sender}' for sender in NEWSLETTER_SENDERS])
-        query_with_senders = f'{query} AND ({sender_query})'
+        newsletter_query = (
+            f'{query} AND (({sender_query}) OR from:tldr OR '
+            f'subject:(newsletter OR daily OR weekly OR digest OR roundup OR briefing OR tldr))'
+        )
         
         # Search for emails
-        results = service.users().messages().list(userId='me', q=query_with_senders, maxResults=50).execute()
-        messages = results.get('messages', [])
+        messages = await asyncio.to_thread(list_messages, service, newsletter_query)
         
-        process_log.append(f"Found {len(messages)} emails from known newsletter domains")
+        process_log.append(f"Found {len(messages)} emails from known newsletter domains or newsletter subjects")
         
-        # If no emails found, try broader search for newsletter-like emails
+        # If no emails found, fall back to recent emails and filter manually
         if len(messages) == 0:
-            process_log.append("No emails from known domains, trying broader search...")
-            # Search for emails that might be newsletters (contain "newsletter", "daily", "weekly", etc.)
-            broader_query = f'{query} AND (subject:newsletter OR subject:daily OR subject:weekly OR subject:digest OR subject:roundup OR subject:briefing OR from:tldr OR subject:tldr)'
-            results = service.users().messages().list(userId='me', q=broader_query, maxResults=50).execute()
-            messages = results.get('messages', [])
-            process_log.append(f"Found {len(messages)} emails from broader search")
-        
-        # If still no emails, try even broader search
-        if len(messages) == 0:
-            process_log.append("Still no emails, trying even broader search...")
-            # Just search for recent emails and filter manually
-            results = service.users().messages().list(userId='me', q=query, maxResults=100).execute()
-            messages = results.get('messages', [])
+            process_log.append("No newsletter emails found, trying broader search...")
+            messages = await asyncio.to_thread(list_messages, service, query)
             process_log.append(f"Found {len(messages)} total recent emails to filter manually")
 
         # Final count after all search attempts
         process_log.append(f"Total messages to process: {len(messages)}")
         
-        for message in messages:
+        # Pass 1: fetch only the headers needed to filter, in batched round trips
+        metadata = await asyncio.to_thread(
+            batch_get_messages, service, [message['id'] for message in messages],
+            format='metadata', metadataHeaders=['From', 'Subject', 'Date', 'List-ID'],
+            fields=GMAIL_METADATA_FIELDS
+        )
+
+        candidates = []
+        for message_id, msg, error in metadata:
             try:
-                # Get full message
-                msg = service.users().messages().get(userId='me', id=message['id']).execute()
-                
-                headers = msg['payload'].get('headers', [])
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown Sender')
-                date = next((h['value'] for h in headers if h['name'] == 'Date'), 'Unknown Date')
+                if error is not None:
+                    raise error
+                if msg is None:
+                    raise ValueError("no response in batch")
+
+                hdr = {h['name']: h['value'] for h in msg['payload'].get('headers', [])}
+                subject = hdr.get('Subject', 'No Subject')
+                sender = hdr.get('From', 'Unknown Sender')
+                date = hdr.get('Date', 'Unknown Date')
+                list_id = hdr.get('List-ID')
                 
-                # Extract email body using recursive function
-                body = extract_html_part(msg['payload']) or ""
-                
-                # Check if this is a valid newsletter (not promotional)
-                is_valid = is_valid_newsletter(sender, subject, body, headers)
+                # Check if this is a valid newsletter (not promotional) - headers are enough
+                is_valid = is_valid_newsletter(sender, subject, '', list_id)
                 process_log.append(f"Email from {sender}: '{subject}' - Valid: {is_valid}")
                 
                 if not is_valid:
                     process_log.append(f"Skipped promotional email from {sender}: {subject}")
                     continue
-                
-                # Parse newsletter content
-                stories = parse_newsletter_content(body, sender, subject)
-                
-                newsletters.append({
-                    "sender": sender,
-                    "subject": subject,
-                    "date": date,
-                    "stories": stories
-                })
-                
-                process_log.append(f"Processed newsletter from {sender}: {len(stories)} stories found")
-                
+
+                candidates.append((message_id, sender, subject, date))
+
             except Exception as e:
-                process_log.append(f"Error processing message {message['id']}: {str(e)}")
+                process_log.append(f"Error processing message {message_id}: {str(e)}")
                 continue
+
+        # Pass 2: fetch full bodies only for messages that passed the filter. A producer
+        # fetches batches while the consumer parses the previous one.
+        queue = asyncio.Queue(maxsize=2)
+
+        async def _fetch_bodies():
+            for start in range(0, len(candidates), GMAIL_BODY_BATCH_SIZE):
+                chunk = candidates[start:start + GMAIL_BODY_BATCH_SIZE]
+                bodies = await asyncio.to_thread(batch_get_messages, service, [c[0] for c in chunk],
+                                             format='full', fields=GMAIL_BODY_FIELDS)
+                await queue.put((chunk, bodies))
+            await queue.put(None)
+
+        async def _parse_bodies():
+            while (item := await queue.get()) is not None:
+                chunk, bodies = item
+                extracted = []
+                for (message_id, sender, subject, date), (_, msg, error) in zip(chunk, bodies):
+                    try:
+                        if error is not None:
+                            raise error
+                        if msg is None:
+                            raise ValueError("no response in batch")
+
+                        # Extract email body, preferring the text/plain part
+                        body = extract_html_part(msg['payload']) or ""
+                        extracted.append((message_id, sender, subject, date, body))
+
+                    except Exception as e:
+                        process_log.append(f"Error processing message {message_id}: {str(e)}")
+                        continue
+
+                # Parsing takes a few milliseconds per email, so worker threads are enough to
+                # keep it off the event loop (worker processes would each re-import this module)
+                parsed = await asyncio.gather(*[
+                    asyncio.to_thread(parse_newsletter_content, body, sender, subject)
+                    for _, sender, subject, _, body in extracted
+                ], return_exceptions=True)
+
+                for (message_id, sender, subject, date, _), stories in zip(extracted, parsed):
+                    if isinstance(stories, Exception):
+                        process_log.append(f"Error processing message {message_id}: {str(stories)}")
+                        continue
+
+                    newsletters.append({
+                        "sender": sender,
+                        "subject": subject,
+                        "date": date,
+                        "stories": stories
+                    })
+
+                    process_log.append(f"Processed newsletter from {sender}: {len(stories)} stories found")
+
+        # If either stage fails, cancel the other so neither is left blocked on the queue
+        stages = {asyncio.create_task(_fetch_bodies()), asyncio.create_task(_parse_bodies())}
+        done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
         
         return {
             "status": "success",
@@ -495,6 +687,8 @@ def fetch_newsletters_from_inbox(tool_context: ToolContext) -> Dict[str, any]:
         }
         
     except Exception as e:
+        if isinstance(e, RefreshError):
+            invalidate_gmail_service()
         return {
             "status": "error", 
             "message": f"Failed to fetch newsletters: {str(e)}",
@@ -503,13 +697,26 @@ def fetch_newsletters_from_inbox(tool_context: ToolContext) -> Dict[str, any]:
             "total_processed": 0
         }
 
-def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
-    """Helper function to save audio data as a wave file"""
-    with wave.open(filename, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(sample_width)
-        wf.setframerate(rate)
-        wf.writeframes(pcm)
+def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2, chunk_size=1 << 16):
+    """Helper function to save audio data as a wave file.
+
+    PCM is streamed in chunks from a memoryview (no copies) into a temporary file
+    that is renamed into place, so a failed write never leaves a partial file.
+    """
+    path = pathlib.Path(filename)
+    tmp_path = path.with_name(path.name + ".part")
+    try:
+        with wave.open(str(tmp_path), "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(sample_width)
+            wf.setframerate(rate)
+            view = memoryview(pcm)
+            for start in range(0, len(view), chunk_size):
+                wf.writeframesraw(view[start:start + chunk_size])
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
         
 
 async def generate_podcast_audio(podcast_script: str, tool_context: ToolContext, filename: str = "'ai_today_podcast") -> Dict[str, str]:
@@ -533,7 +740,7 @@ async def generate_podcast_audio(podcast_script: str, tool_context: ToolContext,
             client = genai.Client()
             prompt = f"TTS the following conversation between Joe and Jane:\n\n{podcast_script}"
 
-            response = client.models.generate_content(
+            response = await client.aio.models.generate_content(
                 model="gemini-2.5-flash-preview-tts",
                 contents=prompt,
                 config=types.GenerateContentConfig(
@@ -559,13 +766,17 @@ async def generate_podcast_audio(podcast_script: str, tool_context: ToolContext,
             # ** BUG FIX **: This logic now runs for all cases, not just when the extension is added.
             current_directory = pathlib.Path.cwd()
             file_path = current_directory / filename
-            wave_file(str(file_path), data)
+            await asyncio.to_thread(wave_file, str(file_path), data)
+
+            # Release the PCM buffer before returning; it can be tens of MB
+            file_size = len(data)
+            del data, response
 
             return {
                 "status": "success",
                 "message": f"Successfully generated and saved podcast audio to {file_path.resolve()}",
                 "file_path": str(file_path.resolve()),
-                "file_size": len(data)
+                "file_size": file_size
             }
 
         except Exception as e:
@@ -576,7 +787,7 @@ async def generate_podcast_audio(podcast_script: str, tool_context: ToolContext,
                 if attempt < max_retries - 1:
                     wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
                     print(f"⚠️  API overloaded, retrying in {wait_time} seconds... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
                 else:
                     return {"status": "error", "message": f"Audio generation failed after {max_retries} attempts: API overloaded. Please try again later."}
@@ -584,7 +795,34 @@ async def generate_podcast_audio(podcast_script: str, tool_context: ToolContext,
             # For other errors, don't retry
             return {"status": "error", "message": f"Audio generation failed: {error_msg[:200]}"}
 
-def get_financial_context(tickers: List[str]) -> Dict[str, str]:
+def _fetch_ticker_context(ticker_symbol: str) -> tuple:
+    """Fetch and format price data for a single ticker, served from cache when fresh."""
+    now = time.monotonic()
+    with _TICKER_CACHE_LOCK:
+        cached = _TICKER_CACHE.get(ticker_symbol)
+    if cached and now - cached[0] < _TICKER_TTL:
+        return ticker_symbol, cached[1]
+
+    try:
+        stock = yf.Ticker(ticker_symbol)
+        info = stock.info
+        price = info.get("currentPrice") or info.get("regularMarketPrice")
+        change_percent = info.get("regularMarketChangePercent")
+        
+        if price is not None and change_percent is not None:
+            change_str = f"{change_percent * 100:+.2f}%"
+            formatted = f"${price:.2f} ({change_str})"
+            with _TICKER_CACHE_LOCK:
+                _TICKER_CACHE[ticker_symbol] = (now, formatted)
+                if len(_TICKER_CACHE) > _TICKER_CACHE_MAX:
+                    oldest = min(_TICKER_CACHE, key=lambda sym: _TICKER_CACHE[sym][0])
+                    del _TICKER_CACHE[oldest]
+            return ticker_symbol, formatted
+        return ticker_symbol, "Price data not available."
+    except Exception:
+        return ticker_symbol, "Invalid Ticker or Data Error"
+
+async def get_financial_context(tickers: List[str]) -> Dict[str, str]:
     """
     Fetches the current stock price and daily change for a list of stock tickers.
     """
@@ -596,25 +834,15 @@ def get_financial_context(tickers: List[str]) -> Dict[str, str]:
     
     if not valid_tickers:
         return {ticker: "No financial data" for ticker in tickers}
-        
-    for ticker_symbol in valid_tickers:
-        try:
-            stock = yf.Ticker(ticker_symbol)
-            info = stock.info
-            price = info.get("currentPrice") or info.get("regularMarketPrice")
-            change_percent = info.get("regularMarketChangePercent")
-            
-            if price is not None and change_percent is not None:
-                change_str = f"{change_percent * 100:+.2f}%"
-                financial_data[ticker_symbol] = f"${price:.2f} ({change_str})"
-            else:
-                financial_data[ticker_symbol] = "Price data not available."
-        except Exception:
-            financial_data[ticker_symbol] = "Invalid Ticker or Data Error"
+
+    # Each lookup is an independent blocking HTTPS call, so run them concurrently
+    results = await asyncio.gather(*(asyncio.to_thread(_fetch_ticker_context, t) for t in valid_tickers))
+    for ticker_symbol, context in results:
+        financial_data[ticker_symbol] = context
             
     return financial_data
 
-def save_news_to_markdown(filename: str, content: str) -> Dict[str, str]:
+async def save_news_to_markdown(filename: str, content: str) -> Dict[str, str]:
     """
     Saves the given content to a Markdown file in the current directory.
     """
@@ -623,7 +851,7 @@ def save_news_to_markdown(filename: str, content: str) -> Dict[str, str]:
             filename += ".md"
         current_directory = pathlib.Path.cwd()
         file_path = current_directory / filename
-        file_path.write_text(content, encoding="utf-8")
+        await asyncio.to_thread(file_path.write_text, content, encoding="utf-8")
         return {
             "status": "success",
             "message": f"Successfully saved news to {file_path.resolve()}",
@@ -3,16 +3,54 @@
 
 import re
 import base64
+import sqlite3
+import zlib
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+import lxml.html
+from lxml.etree import ParserError
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
-
-def extract_text_from_html(html_content: str) -> str:
-    """Extract clean text from HTML content."""
+# Set to compare against the BeautifulSoup extraction
+USE_BS4 = False
+CACHE_FILE = 'debug_parse_cache.sqlite3'
+
+# Patterns for scanning the whole text at once, compiled once. [^\S\n] is whitespace
+# other than newline, so no part of a pattern can run across lines.
+_WS = r'[^\S\n]'
+_HEADLINE = rf"[A-Z](?:[A-Z&',AI-]|{_WS})+{_WS}*\(\d+{_WS}+MINUTE{_WS}+READ\){_WS}*\[\d+\]"
+# A line that ends a story, as one alternation; lastgroup names the reason:
+# next headline, emoji-only marker, or ALL CAPS section header over 20 chars
+STOP_RE = re.compile(
+    rf"{_WS}*(?:(?P<hl>{_HEADLINE})|(?P<emoji>[🚀🧠💼📱🎯🔥]+{_WS}*$)|(?P<section>[A-Z&](?:[A-Z&]|{_WS}){{19,}}[A-Z&]{_WS}*$))",
+    re.MULTILINE,
+)
+STOP_REASONS = {'hl': 'next headline', 'emoji': 'emoji marker', 'section': 'section header'}
+STORY_RE = re.compile(
+    rf"^{_WS}*([A-Z](?:[A-Z&',AI-]|{_WS})+){_WS}*\((\d+){_WS}+MINUTE{_WS}+READ\){_WS}*\[\d+\][^\n]*\n"
+    rf"(?P<body>(?:(?!{STOP_RE.pattern})[^\n]*\n)*)",
+    re.MULTILINE,
+)
+
+# Order to visit sibling MIME parts, so text/plain is found before text/html
+# even when a sender lists the HTML alternative first
+MIME_PRIORITY = {'text/plain': 0, 'text/html': 1, 'multipart/alternative': 2, 'multipart/related': 3, 'multipart/mixed': 4}
+
+# Translation table that deletes zero-width non-joiners
+_DROP = str.maketrans('', '', '\u200c')
+SPACES_RE = re.compile(r' +')
+
+# Build only the <body> subtree; <head> (meta, link, its scripts/styles) is skipped
+STRAINER = SoupStrainer('body')
+
+def extract_text_from_html_bs4(html_content: str) -> str:
+    """Extract clean text from HTML content with BeautifulSoup."""
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        try:
+            soup = BeautifulSoup(html_content, 'lxml', parse_only=STRAINER)
+        except (ParserError, FeatureNotFound):
+            soup = BeautifulSoup(html_content, 'html.parser')
         for script in soup(["script", "style"]):
             script.decompose()
         text = soup.get_text()
@@ -23,87 +61,130 @@ def extract_text_from_html(html_content: str) -> str:
     except Exception as e:
         return html_content
 
+def extract_text_from_html(html_content: str) -> str:
+    """Extract clean text from HTML content: one lxml tree, one traversal, one whitespace collapse."""
+    if USE_BS4:
+        return extract_text_from_html_bs4(html_content)
+    try:
+        root = lxml.html.fromstring(html_content)
+        for el in root.xpath('//script|//style|//head|//noscript'):
+            el.drop_tree()  # unlike remove(), keeps the element's tail text
+        return ' '.join(root.text_content().split())
+    except Exception:
+        return extract_text_from_html_bs4(html_content)
+
+def extract_html_part(payload):
+    """Return (mime_type, body), preferring a text/plain part over text/html."""
+    stack = [payload]
+    html_data = None
+    while stack:
+        part = stack.pop()
+        mime_type = part.get('mimeType', '')
+        body = part.get('body', {})
+        if mime_type == 'text/plain' and body.get('data'):
+            return mime_type, base64.urlsafe_b64decode(body['data']).decode('utf-8', errors='ignore')
+        if mime_type == 'text/html' and body.get('data') and html_data is None:
+            html_data = body['data']
+        # Highest-priority part is pushed last so it is popped first
+        # (reversed after a stable sort, so equal-priority parts keep document order)
+        stack.extend(reversed(sorted(part.get('parts', ()), key=lambda p: MIME_PRIORITY.get(p.get('mimeType'), 99))))
+    if html_data is not None:
+        return 'text/html', base64.urlsafe_b64decode(html_data).decode('utf-8', errors='ignore')
+    return None, None
+
 token_file = 'token.json'
 creds = Credentials.from_authorized_user_file(token_file, SCOPES)
 service = build('gmail', 'v1', credentials=creds)
 
-results = service.users().messages().list(userId='me', q='from:tldr', maxResults=1).execute()
+results = service.users().messages().list(userId='me', q='from:tldr', maxResults=10, fields='messages/id').execute()
 messages = results.get('messages', [])
 
-msg = service.users().messages().get(userId='me', id=messages[0]['id']).execute()
-
-def extract_html_part(part):
-    if part.get('mimeType') == 'text/html':
-        if 'data' in part.get('body', {}):
-            return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
-    if part.get('mimeType') == 'text/plain':
-        if 'data' in part.get('body', {}):
-            return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
-    if 'parts' in part:
-        for subpart in part['parts']:
-            result = extract_html_part(subpart)
-            if result:
-                return result
-    return None
-
-body = extract_html_part(msg['payload'])
-clean_text = extract_text_from_html(body)
+# Pass 1: headers only, batched, to pick a message that is really from TLDR
+metadata = {}
+batch = service.new_batch_http_request(callback=lambda request_id, response, exception: metadata.update({request_id: response}))
+for message in messages:
+    batch.add(service.users().messages().get(userId='me', id=message['id'], format='metadata',
+                                             metadataHeaders=['From', 'Subject', 'Date'], fields='internalDate,payload/headers'),
+              request_id=message['id'])
+batch.execute()
+
+chosen = None
+for message in messages:
+    response = metadata.get(message['id'])
+    if not response:
+        continue
+    headers = {h['name']: h['value'] for h in response['payload'].get('headers', [])}
+    if 'tldr' in headers.get('From', '').lower():
+        chosen = message['id']
+        internal_date = int(response.get('internalDate', 0))
+        print(f"Using: {headers.get('Subject', 'No Subject')} ({headers.get('Date', 'Unknown Date')})")
+        break
+
+if chosen is None:
+    raise SystemExit("No TLDR newsletter found")
+
+# Message bodies never change, so the decoded body is cached across runs;
+# extraction still runs every time so USE_BS4 and extractor changes take effect
+cache = sqlite3.connect(CACHE_FILE)
+cache.execute('CREATE TABLE IF NOT EXISTS msgbody(id TEXT PRIMARY KEY, internal_date INTEGER, mime_type TEXT, body BLOB)')
+row = cache.execute('SELECT internal_date, mime_type, body FROM msgbody WHERE id = ?', (chosen,)).fetchone()
+
+if row and row[0] == internal_date:
+    print("Using cached body")
+    mime_type, body = row[1], zlib.decompress(row[2]).decode('utf-8')
+else:
+    # Pass 2: full payload for the chosen message only
+    msg = service.users().messages().get(userId='me', id=chosen, format='full',
+                                         fields='payload(mimeType,body/data,parts(mimeType,body/data,parts))').execute()
+
+    mime_type, body = extract_html_part(msg['payload'])
+    if body is None:
+        raise SystemExit("No text or HTML part found")
+
+    with cache:
+        cache.execute('INSERT OR REPLACE INTO msgbody VALUES (?, ?, ?, ?)',
+                      (chosen, internal_date, mime_type, zlib.compress(body.encode('utf-8'))))
+cache.close()
+
+# Plain-text parts are already clean; only HTML needs parsing
+clean_text = body if mime_type == 'text/plain' else extract_text_from_html(body)
 
 # Clean up
-clean_text = re.sub(r'‌', '', clean_text)
-clean_text = re.sub(r' +', ' ', clean_text)
+clean_text = clean_text.translate(_DROP)
+clean_text = SPACES_RE.sub(' ', clean_text)
 
-lines = clean_text.split('\n')
+if not clean_text.endswith('\n'):
+    clean_text += '\n'
 
-print(f"Total lines: {len(lines)}\n")
+total_lines = clean_text.count('\n')
+print(f"Total lines: {total_lines}\n")
 print("=" * 80)
 
-headline_pattern = r'^([A-Z][A-Z\s&\',AI-]+)\s*\((\d+)\s+MINUTE\s+READ\)\s*\[\d+\]'
 stories = []
 
-i = 0
-while i < len(lines) and len(stories) < 5:
-    line = lines[i].strip()
-    match = re.match(headline_pattern, line)
-
-    if match:
-        headline = match.group(1).strip()
-        print(f"\n✅ Found headline at line {i}: {headline}")
-
-        # Collect content
-        content_lines = []
-        j = i + 1
-        while j < len(lines) and len(content_lines) < 10:
-            next_line = lines[j].strip()
-
-            if re.match(headline_pattern, next_line):
-                print(f"  Stopped at next headline (line {j})")
-                break
-            if re.match(r'^[🚀🧠💼📱🎯🔥]+\s*$', next_line):
-                print(f"  Stopped at emoji marker (line {j})")
-                break
-            if re.match(r'^[A-Z\s&]+$', next_line) and len(next_line) > 20:
-                print(f"  Stopped at section header (line {j})")
-                break
-
-            if next_line and len(next_line) > 20:
-                content_lines.append(next_line)
-                if len(content_lines) <= 2:
-                    print(f"  Added content: {next_line[:60]}...")
-
-            j += 1
-
-        print(f"  Collected {len(content_lines)} content lines")
-
-        if content_lines:
-            stories.append({"headline": headline, "content": ' '.join(content_lines)[:200]})
-            print(f"  ✅ Added story #{len(stories)}")
-            i = j
-        else:
-            print(f"  ⚠️  No content, skipping")
-            i += 1
+for match in STORY_RE.finditer(clean_text):
+    headline = match.group(1).strip()
+    line_number = clean_text.count('\n', 0, match.start())
+    print(f"\n✅ Found headline at line {line_number}: {headline}")
+
+    # Body runs up to the next stop line; keep the first 10 substantial lines
+    content_lines = [line for line in (l.strip() for l in match.group('body').split('\n')) if len(line) > 20][:10]
+    for line in content_lines[:2]:
+        print(f"  Added content: {line[:60]}...")
+
+    stop = STOP_RE.match(clean_text, match.end())
+    if stop:
+        print(f"  Stopped at {STOP_REASONS[stop.lastgroup]}")
+
+    print(f"  Collected {len(content_lines)} content lines")
+
+    if content_lines:
+        stories.append({"headline": headline, "content": ' '.join(content_lines)[:200]})
+        print(f"  ✅ Added story #{len(stories)}")
+        if len(stories) >= 5:
+            break
     else:
-        i += 1
+        print(f"  ⚠️  No content, skipping")
 
 print("\n" + "=" * 80)
 print(f"\n📊 FINAL: Extracted {len(stories)} stories\n")